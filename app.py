@@ -1,15 +1,66 @@
-from flask import Flask, render_template, request
+import json
+from hashlib import blake2b
+
+from flask import Flask, Response, jsonify, render_template, request
 from monitoring.collector import VMCollector
-from monitoring.analyzer import VMAnalyzer
+from monitoring.analyzer import STATUS_CODES, VMAnalyzer
 from monitoring.recommender import VMRecommender
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 app = Flask(__name__)
 
+if orjson is not None:
+    from flask.json.provider import JSONProvider
+
+    class OrjsonProvider(JSONProvider):
+        # orjson serializes large analysis/report payloads several times
+        # faster than stdlib json; OPT_SERIALIZE_NUMPY handles any NumPy
+        # scalars coming out of the vectorized analyzer directly.
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = OrjsonProvider(app)
+
+@app.template_filter("status_name")
+def status_name(code):
+    return STATUS_CODES.get(code, "unknown")
+
+def _collect_analysis(csp, subscription=""):
+    metrics = VMCollector(csp, subscription).collect()
+    return VMAnalyzer(metrics).analyze()
+
+def _conditional_json(payload):
+    # Tag API responses with a content ETag so a polling dashboard gets
+    # a bodyless 304 instead of a re-serialized payload when the fleet
+    # has not changed.
+    response = jsonify(payload)
+    response.set_etag(blake2b(response.get_data(), digest_size=8).hexdigest())
+    response.headers["Cache-Control"] = "private, max-age=30"
+    return response.make_conditional(request)
+
+# Pre-warm the default provider at startup so the first dashboard
+# request is served from the metrics cache instead of paying the full
+# collection latency.
+try:
+    VMCollector("AWS").collect()
+except Exception as e:
+    print(f"Could not pre-warm metrics cache: {e}")
+
 @app.route("/", methods=["GET", "POST"])
 def dashboard():
     csp = request.form.get("csp", "AWS")
     subscription = request.form.get("subscription", "")
 
+    if request.form.get("refresh"):
+        VMCollector.invalidate(csp, subscription)
+
     metrics = VMCollector(csp, subscription).collect()
     analysis = VMAnalyzer(metrics).analyze()
     recommendations = VMRecommender(analysis).generate()
@@ -20,5 +71,53 @@ def dashboard():
                            analysis=analysis,
                            recommendations=recommendations)
 
+@app.route("/api/analysis/<cloud_provider>")
+def get_analysis(cloud_provider):
+    subscription = request.args.get("subscription", "")
+    return _conditional_json({
+        "status_codes": STATUS_CODES,
+        "analysis": _collect_analysis(cloud_provider, subscription),
+    })
+
+@app.route("/api/all/<cloud_provider>")
+def get_all(cloud_provider):
+    # Combined payload for a full dashboard refresh: one metrics
+    # collection feeds every derived view, instead of each endpoint
+    # re-collecting the same fleet.
+    subscription = request.args.get("subscription", "")
+    analysis = _collect_analysis(cloud_provider, subscription)
+    recommender = VMRecommender(analysis)
+    return _conditional_json({
+        "status_codes": STATUS_CODES,
+        "analysis": analysis,
+        "recommendations": recommender.generate(),
+        "cost_report": recommender.generate_cost_report(),
+    })
+
+@app.route("/api/cost-report/<cloud_provider>")
+def get_cost_report(cloud_provider):
+    subscription = request.args.get("subscription", "")
+    analysis = _collect_analysis(cloud_provider, subscription)
+    return _conditional_json(VMRecommender(analysis).generate_cost_report())
+
+@app.route("/api/analysis/stream/<cloud_provider>")
+def stream_analysis(cloud_provider):
+    # Server-sent events: one analysis row per event, so large fleets
+    # start rendering at first-row latency instead of after the full
+    # payload is serialized. Consumed via EventSource on the frontend.
+    subscription = request.args.get("subscription", "")
+    analysis = _collect_analysis(cloud_provider, subscription)
+
+    def generate():
+        # Lead with the status-code legend so consumers can decode the
+        # integer codes in the row events that follow.
+        yield f"data: {json.dumps({'status_codes': STATUS_CODES})}\n\n"
+        for row in analysis:
+            yield f"data: {json.dumps(row)}\n\n"
+
+    return Response(generate(), mimetype="text/event-stream")
+
 if __name__ == "__main__":
+    # Development server only (single-threaded). In production run
+    # under gunicorn: gunicorn -c gunicorn.conf.py app:app
     app.run(debug=True)
@@ -0,0 +1,11 @@
+import multiprocessing
+
+# Run with: gunicorn -c gunicorn.conf.py app:app
+#
+# The endpoints block on cloud provider API I/O, so gevent workers let
+# each process keep serving other requests while one waits on the
+# network.
+bind = "0.0.0.0:8000"
+workers = 2 * multiprocessing.cpu_count() + 1
+worker_class = "gevent"
+timeout = 60
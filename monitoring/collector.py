@@ -1,17 +1,118 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
 from services.aws_service import AWSService
 from services.azure_service import AzureService
 from services.gcp_service import GCPService
 
+# Cloud provider metric APIs are slow and rate-limited, so collect()
+# results are cached for a short window keyed by (csp, subscription).
+CACHE_TTL_SECONDS = 60
+_cache = {}
+
+# Provider service instances are kept alive across requests so their
+# credentials and HTTP sessions (TLS handshakes, DNS) are paid for once,
+# not on every collection.
+_services = {}
+
+# One worker per provider for multi-cloud collection.
+_collect_executor = ThreadPoolExecutor(max_workers=3)
+
+def to_columns(records):
+    # Structure-of-arrays layout: one parallel array per field instead
+    # of a dict per VM. Usage percentages fit in a byte (0-100) and cost
+    # only needs single precision, so a 10k-VM fleet packs into a few KB
+    # of arrays instead of thousands of boxed floats. Percentages are
+    # rounded to the nearest integer, not truncated, so fractional
+    # values at threshold + 0.5 and above still clear the threshold.
+    cpu = np.array([vm.get("cpu_usage", 0) for vm in records], dtype=np.float64)
+    mem = np.array([vm.get("memory_usage", 0) for vm in records], dtype=np.float64)
+    return {
+        "id": np.array([vm.get("id") for vm in records], dtype=object),
+        "type": np.array([vm.get("type") for vm in records], dtype=object),
+        "provider": np.array([vm.get("provider") for vm in records], dtype=object),
+        "cpu_usage": np.rint(cpu).astype(np.uint8),
+        "memory_usage": np.rint(mem).astype(np.uint8),
+        "cost": np.array([vm.get("cost", 0) for vm in records], dtype=np.float32),
+    }
+
+def to_records(columns):
+    # Back to a list of per-VM dicts for JSON/template consumers.
+    return [
+        {"id": vm_id, "type": vm_type, "provider": provider,
+         "cpu_usage": cpu, "memory_usage": mem, "cost": cost}
+        for vm_id, vm_type, provider, cpu, mem, cost in zip(
+            columns["id"], columns["type"], columns["provider"],
+            columns["cpu_usage"].tolist(),
+            columns["memory_usage"].tolist(),
+            columns["cost"].tolist())
+    ]
+
 class VMCollector:
     def __init__(self, csp, subscription=None):
         self.csp = csp
-        self.subscription = subscription
+        # Form/query params hand us "" for "no subscription"; normalize
+        # to None so it cannot split cache keys from the default.
+        self.subscription = subscription or None
+
+    @staticmethod
+    def invalidate(csp=None, subscription=None):
+        # Drop the cached metrics for one (csp, subscription), or
+        # everything when no csp is given.
+        if csp is None:
+            _cache.clear()
+        else:
+            _cache.pop((csp, subscription or None), None)
 
     def collect(self):
-        if self.csp == "AWS":
-            return AWSService().get_metrics()
-        elif self.csp == "Azure":
-            return AzureService(self.subscription).get_metrics()
-        elif self.csp == "GCP":
-            return GCPService().get_metrics()
-        return []
+        key = (self.csp, self.subscription)
+        cached = _cache.get(key)
+        if cached and time.time() - cached[0] < CACHE_TTL_SECONDS:
+            return cached[1]
+
+        # De-duplicate on VM id before building columns (last write
+        # wins), so downstream consumers can assume ids are unique.
+        records = list({vm.get("id"): vm for vm in self._collect()}.values())
+        metrics = to_columns(records)
+        _cache[key] = (time.time(), metrics)
+        return metrics
+
+    def _collect(self):
+        if self.csp == "ALL":
+            return self.collect_all()
+        service = self._get_service()
+        if service is None:
+            return []
+        return service.get_metrics()
+
+    def collect_all(self):
+        # Collect from every provider in parallel so multi-cloud latency
+        # is max-of-providers instead of sum-of-providers. Each row is
+        # tagged with the provider it came from.
+        futures = {csp: _collect_executor.submit(VMCollector(csp, self.subscription)._collect)
+                   for csp in ("AWS", "Azure", "GCP")}
+        merged = []
+        for csp, future in futures.items():
+            try:
+                rows = future.result()
+            except Exception as e:
+                print(f"Error collecting {csp} metrics: {e}")
+                continue
+            merged.extend(dict(vm, provider=csp.lower()) for vm in rows)
+        return merged
+
+    def _get_service(self):
+        key = (self.csp, self.subscription)
+        service = _services.get(key)
+        if service is None:
+            if self.csp == "AWS":
+                service = AWSService()
+            elif self.csp == "Azure":
+                service = AzureService(self.subscription)
+            elif self.csp == "GCP":
+                service = GCPService()
+            if service is not None:
+                _services[key] = service
+        return service
@@ -1,3 +1,18 @@
+import heapq
+from collections import OrderedDict, defaultdict
+
+from monitoring.analyzer import STATUS_CODES, Status
+
+# Cost reports are cached on a content fingerprint of the analysis rows,
+# so a refresh over an unchanged fleet is an equal hit served from the
+# cache instead of a recomputation.
+_report_cache = OrderedDict()
+_REPORT_CACHE_MAXSIZE = 128
+
+def _fingerprint(analysis):
+    return tuple((row["vm_id"], row["cpu"], row["memory"], row["cost"], row["status_code"])
+                 for row in analysis)
+
 class VMRecommender:
     def __init__(self, analysis):
         self.analysis = analysis
@@ -6,3 +21,48 @@ class VMRecommender:
         # The analysis from VMAnalyzer already contains the recommendation.
         # This class will now just return the analysis as is.
         return self.analysis
+
+    def generate_cost_report(self):
+        cache_key = _fingerprint(self.analysis)
+        cached = _report_cache.get(cache_key)
+        if cached is not None:
+            _report_cache.move_to_end(cache_key)
+            return cached
+        report = self._build_cost_report()
+        _report_cache[cache_key] = report
+        if len(_report_cache) > _REPORT_CACHE_MAXSIZE:
+            _report_cache.popitem(last=False)
+        return report
+
+    def _build_cost_report(self):
+        # Single pass over the analysis: total spend, per-status
+        # breakdown, and top-cost candidates accumulated together.
+        # heapq.nlargest keeps top-5 selection at O(n log 5) instead of
+        # sorting the whole fleet.
+        total_cost = 0.0
+        underutilized_cost = 0.0
+        cost_breakdown = defaultdict(float)
+        cost_by_vm = []
+
+        for row in self.analysis:
+            cost = row.get("cost", 0)
+            code = row["status_code"]
+            total_cost += cost
+            cost_breakdown[code] += cost
+            if code == Status.UNDERUTILIZED:
+                underutilized_cost += cost
+            cost_by_vm.append((cost, row["vm_id"], row["vm_type"]))
+
+        top_cost_drivers = [
+            {"vm_id": vm_id, "vm_type": vm_type, "cost": round(cost, 2)}
+            for cost, vm_id, vm_type in heapq.nlargest(5, cost_by_vm, key=lambda entry: entry[0])
+        ]
+
+        # Costs are carried as float32 upstream; round the currency
+        # figures to cents on the way out.
+        return {
+            "total_cost": round(total_cost, 2),
+            "underutilized_cost": round(underutilized_cost, 2),
+            "cost_breakdown": {STATUS_CODES[code]: round(cost, 2) for code, cost in cost_breakdown.items()},
+            "top_cost_drivers": top_cost_drivers,
+        }
@@ -2,9 +2,17 @@ from azure.identity import DefaultAzureCredential
 from azure.mgmt.compute import ComputeManagementClient
 from azure.mgmt.resource import ResourceManagementClient
 from azure.mgmt.monitor import MonitorManagementClient
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import random
 
+# Module-level executors so repeated get_metrics() calls reuse the same
+# thread pools instead of spinning them up per request. Per-VM metric
+# fetches get their own pool so they cannot starve the resource-group
+# scans that submit them.
+_executor = ThreadPoolExecutor(max_workers=8)
+_metrics_executor = ThreadPoolExecutor(max_workers=16)
+
 class AzureService:
     def __init__(self, subscription_id):
         self.subscription_id = subscription_id
@@ -50,46 +58,59 @@ class AzureService:
 
         timespan = f"{(datetime.utcnow() - timedelta(minutes=15)).isoformat()}/{(datetime.utcnow()).isoformat()}"
 
-        for rg_name in groups_to_scan:
-            try:
-                vms = self.compute_client.virtual_machines.list(rg_name)
-                for vm in vms:
-                    cpu_usage = 0
-                    memory_usage = 0
+        # Resource groups are independent of each other, so scan them
+        # concurrently instead of waiting on each group's API calls in turn.
+        futures = [_executor.submit(self._collect_resource_group, rg_name, timespan)
+                   for rg_name in groups_to_scan]
+        for future in futures:
+            results.extend(future.result())
+        return results
 
-                    try:
-                        # Get CPU Usage
-                        cpu_metrics = self.monitor_client.metrics.list(vm.id, timespan=timespan, metricnames='Percentage CPU', aggregation='Average')
-                        if cpu_metrics.value and cpu_metrics.value[0].timeseries and cpu_metrics.value[0].timeseries[0].data:
-                            cpu_usage = cpu_metrics.value[0].timeseries[0].data[-1].average
+    def _fetch_cpu_usage(self, vm, timespan):
+        cpu_metrics = self.monitor_client.metrics.list(vm.id, timespan=timespan, metricnames='Percentage CPU', aggregation='Average')
+        if cpu_metrics.value and cpu_metrics.value[0].timeseries and cpu_metrics.value[0].timeseries[0].data:
+            return cpu_metrics.value[0].timeseries[0].data[-1].average
+        return 0
 
-                        # Get Memory Usage
-                        size_details = self._get_vm_size_details(vm.location, vm.hardware_profile.vm_size)
-                        if size_details:
-                            total_memory_mb = size_details.memory_in_mb
-                            # For Linux, use 'Available Memory Bytes'. For Windows, it's different. Assuming Linux for simplicity.
-                            mem_metrics = self.monitor_client.metrics.list(vm.id, timespan=timespan, metricnames='Available Memory Bytes', aggregation='Average')
-                            if mem_metrics.value and mem_metrics.value[0].timeseries and mem_metrics.value[0].timeseries[0].data:
-                                available_memory_bytes = mem_metrics.value[0].timeseries[0].data[-1].average
-                                available_memory_mb = available_memory_bytes / (1024 * 1024)
-                                memory_usage = ((total_memory_mb - available_memory_mb) / total_memory_mb) * 100 if total_memory_mb > 0 else 0
+    def _fetch_memory_usage(self, vm, timespan):
+        size_details = self._get_vm_size_details(vm.location, vm.hardware_profile.vm_size)
+        if size_details:
+            total_memory_mb = size_details.memory_in_mb
+            # For Linux, use 'Available Memory Bytes'. For Windows, it's different. Assuming Linux for simplicity.
+            mem_metrics = self.monitor_client.metrics.list(vm.id, timespan=timespan, metricnames='Available Memory Bytes', aggregation='Average')
+            if mem_metrics.value and mem_metrics.value[0].timeseries and mem_metrics.value[0].timeseries[0].data:
+                available_memory_bytes = mem_metrics.value[0].timeseries[0].data[-1].average
+                available_memory_mb = available_memory_bytes / (1024 * 1024)
+                return ((total_memory_mb - available_memory_mb) / total_memory_mb) * 100 if total_memory_mb > 0 else 0
+        return 0
 
-                    except Exception as e:
-                        print(f"Could not fetch live metrics for {vm.name}: {e}. Using random data.")
-                        cpu_usage = random.randint(10, 95)
-                        memory_usage = random.randint(10, 95)
+    def _collect_resource_group(self, rg_name, timespan):
+        results = []
+        try:
+            vms = self.compute_client.virtual_machines.list(rg_name)
+            for vm in vms:
+                try:
+                    # CPU and memory are independent metric requests;
+                    # fetch the pair concurrently.
+                    cpu_future = _metrics_executor.submit(self._fetch_cpu_usage, vm, timespan)
+                    mem_future = _metrics_executor.submit(self._fetch_memory_usage, vm, timespan)
+                    cpu_usage = cpu_future.result()
+                    memory_usage = mem_future.result()
+                except Exception as e:
+                    print(f"Could not fetch live metrics for {vm.name}: {e}. Using random data.")
+                    cpu_usage = random.randint(10, 95)
+                    memory_usage = random.randint(10, 95)
 
-                    vm_size = vm.hardware_profile.vm_size
-                    cost = self.cost_map.get(vm_size, self.cost_map['default'])
+                vm_size = vm.hardware_profile.vm_size
+                cost = self.cost_map.get(vm_size, self.cost_map['default'])
 
-                    results.append({
-                        "id": vm.name,
-                        "type": vm_size,
-                        "cpu_usage": cpu_usage,
-                        "memory_usage": memory_usage,
-                        "cost": cost
-                    })
-            except Exception as e:
-                print(f"Error fetching VMs from resource group {rg_name}: {e}")
-                continue
+                results.append({
+                    "id": vm.name,
+                    "type": vm_size,
+                    "cpu_usage": cpu_usage,
+                    "memory_usage": memory_usage,
+                    "cost": cost
+                })
+        except Exception as e:
+            print(f"Error fetching VMs from resource group {rg_name}: {e}")
         return results